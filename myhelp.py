@@ -23,22 +23,30 @@
 # Description:
 #
 # Dependencies:
-# df, file, getent, info, man, which, xdg-mime
+# file, getent, info, man, xdg-mime
 
 import os
 import sys
 import subprocess
 import argparse
 import sqlite3
+import json
 import re
-import yaml
 import psutil
 import collections
+import concurrent.futures
+import functools
 import itertools
 import shlex
+import shutil
+import glob
+import stat
 from enum import auto, IntEnum
 from typing import Pattern, Union, Iterable, Any
 import textwrap
+import threading
+import time
+import contextlib
 
 # Defaults:
 PROGRAM_NAME = os.path.basename(sys.argv[0])
@@ -50,32 +58,153 @@ and files relative to the current working directory."""
 
 DEBUG = False
 
+# Maximum number of lookups memoized by each viewer.
+CACHE_SIZE = 256
+# Seconds before a shared viewer snapshot is rebuilt.
+CACHE_TTL = 300
+# Maximum number of threads running viewers at once.
+MAX_WORKERS = 32
+
+# Patterns used to parse the output of Bash built-in commands:
+_MODE_RE = re.compile(r"^###[ \t]*(\w+)[ \t]*###[ \t\r]*$", re.MULTILINE)
+_ALIAS_RE = re.compile(r"^alias ([^=]*)=(.*)$")
+_DECLARE_RE = re.compile(r"^declare -([^ ]*) ([^ =]*)")
+# Group 2 is "=" for a variable and None for a function:
+_SET_RE = re.compile(r"^([a-zA-Z0-9_]+)(?:(=)| \(\))")
+_TYPE_RE = re.compile(r"^([^ ]*) is (.*)$")
+_NAME_RE = re.compile(r"^[a-zA-Z0-9_]+$")
+
+# Name fields in the output of `lsof -F n`:
+_LSOF_NAME_RE = re.compile(rb"^n(.*)$", re.MULTILINE)
+
+# Octal escapes in the fields of /proc/self/mounts:
+_MOUNT_ESCAPE_RE = re.compile(r"\\([0-7]{3})")
+
+# Pattern used to parse the output of the `file` command:
+_FILE_RE = re.compile(r"^([^:]*):\s+(.*)$")
+
+# Letters that take "an" rather than "a":
+_VOWELS = frozenset("aeiouAEIOU")
+
+# A space that isn't already escaped:
+_UNESCAPED_SPACE_RE = re.compile(r"(?<!\\) ")
+
+# Output of `info -w` when there is no info page for a name.
+_INFO_NOT_FOUND = ("", "dir", "*manpages*")
+
 
 class Spinner:
     """
-    Implements spinner object.
+    Implements spinner object. Used as a context manager, it spins on its own
+    thread until the block exits.
     """
 
+    INTERVAL = 0.1  # Seconds between ticks.
+
     def __init__(self):
         self.spinner = itertools.cycle(["-", "/", "|", "\\"])
+        # Nobody can see the spinner if stdout isn't a terminal.
+        self.enabled = sys.stdout.isatty()
+        self._stop_event = threading.Event()
+        self._thread = None
 
     def __next__(self):
-        sys.stdout.write(next(self.spinner))
+        if not self.enabled:
+            return
+        sys.stdout.write(next(self.spinner) + "\b")
         sys.stdout.flush()
-        sys.stdout.write("\b")
 
     def __enter__(self):
-        next(self)
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.wait(Spinner.INTERVAL):
+            next(self)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.stop()
 
     def stop(self):
-        sys.stdout.write("\b")
-        sys.stdout.write(" ")  # overwrite spinner with blank
-        sys.stdout.write("\r")  # move to next line
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        if not self.enabled:
+            return
+        # Overwrite spinner with blank, then move to start of line.
+        sys.stdout.write("\b \r")
         sys.stdout.flush()
-        del self
+
+
+class SharedInstance:
+    """
+    Mixin for viewers that are expensive to build. `instance` returns a shared
+    snapshot that is rebuilt after CACHE_TTL seconds.
+    """
+
+    _instance = None
+    _instance_time = 0.0
+
+    @classmethod
+    def instance(cls):
+        now = time.monotonic()
+        if cls._instance is None or now - cls._instance_time > CACHE_TTL:
+            cls._instance = cls()
+            cls._instance_time = now
+        return cls._instance
+
+
+def compile_pattern(pattern):
+    """
+    Compile a string glob. Also returns the glob's longest literal fragment, so
+    keys that don't contain it can be rejected without running the regex.
+    :param pattern: regex or string glob.
+    :return: tuple of regex and str ("" for a regex).
+    """
+    if isinstance(pattern, str):
+        return glob_to_regex(pattern), max(split_glob(pattern), key=len)
+    return pattern, ""
+
+
+def search_items(mapping, pattern, return_tuple: bool = False):
+    """
+    Search for every key of `mapping` that matches `pattern`. Keys that don't
+    contain the literal text of a glob are rejected without running the regex.
+    :param mapping: dict with str keys.
+    :param pattern: regex or string glob.
+    :param return_tuple: bool
+    :return: list of values or key/value pairs.
+    """
+    pattern, literal = compile_pattern(pattern)
+    match = pattern.search
+    if return_tuple:
+        return [(key, val) for key, val in mapping.items() if literal in key and match(key)]
+    return [val for key, val in mapping.items() if literal in key and match(key)]
+
+
+def scan_items_many(mapping, patterns: list, fmt):
+    """
+    Format every key of `mapping` that matches one of several globs. A combined
+    regex rejects the keys that match none of them in a single regex call per key.
+    :param mapping: dict with str keys.
+    :param patterns: list of str globs.
+    :param fmt: function taking (value, key) and returning a list.
+    :return: dict mapping each glob to a list.
+    """
+    results = {pattern: [] for pattern in patterns}
+    if not patterns:
+        return results
+    combined = glob_to_regex_many(tuple(patterns)).search
+    regexes = [(pattern, glob_to_regex(pattern).search) for pattern in patterns]
+    for key, val in mapping.items():
+        if combined(key):
+            for pattern, match in regexes:
+                if match(key):
+                    results[pattern].extend(fmt(val, key))
+    return results
 
 
 class PatternDict(dict):
@@ -86,22 +215,24 @@ class PatternDict(dict):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def search(self, pattern: re.Pattern, return_tuple: bool = False):
+    def search(self, pattern, return_tuple: bool = False):
         """
         Search for every key that matches `pattern`. If `return_tuple` is True, return
         a list of (key, value) pairs. Otherwise return a list of values.
-        :param pattern: regex (assumes that keys are strings).
+        :param pattern: regex or string glob (assumes that keys are strings).
         :param return_tuple: bool
         :return: list of values or key/value pairs.
         """
-        results = []
-        for key, val in self.items():
-            if pattern.search(key):
-                if return_tuple:
-                    results.append((key, val))
-                else:
-                    results.append(val)
-        return results
+        return search_items(self, pattern, return_tuple)
+
+    def scan_many(self, patterns: list, fmt):
+        """
+        Format every key that matches any of `patterns` in a single pass.
+        :param patterns: list of str globs.
+        :param fmt: function taking (value, key) and returning a list.
+        :return: dict mapping each glob to a list.
+        """
+        return scan_items_many(self, patterns, fmt)
 
 
 class PatternCounter(collections.Counter):
@@ -112,26 +243,41 @@ class PatternCounter(collections.Counter):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def search(self, pattern: re.Pattern, return_tuple: bool = False):
+    def search(self, pattern, return_tuple: bool = False):
         """
         Search for every key that matches `pattern`. If `return_tuple` is True, return
         a list of (key, value) pairs. Otherwise return a list of values.
-        :param pattern: regex (assumes that keys are strings).
+        :param pattern: regex or string glob (assumes that keys are strings).
         :param return_tuple: bool
         :return: list of values or key/value pairs.
         """
-        results = []
-        for key, val in self.items():
-            if pattern.search(key):
-                if return_tuple:
-                    results.append((key, val))
-                else:
-                    results.append(val)
-        return results
+        return search_items(self, pattern, return_tuple)
+
+    def scan(self, pattern, fmt):
+        """
+        Format every key that matches `pattern` in a single pass.
+        :param pattern: regex or string glob (assumes that keys are strings).
+        :param fmt: function taking (count, key) and returning a list of str.
+        :return: list of str.
+        """
+        pattern, literal = compile_pattern(pattern)
+        match = pattern.search
+        return [msg for key, val in self.items()
+                if literal in key and match(key) for msg in fmt(val, key)]
+
+    def scan_many(self, patterns: list, fmt):
+        """
+        Like `scan`, but for several globs at once. A combined regex rejects the
+        keys that match none of them in a single regex call per key.
+        :param patterns: list of str globs.
+        :param fmt: function taking (count, key) and returning a list of str.
+        :return: dict mapping each glob to a list of str.
+        """
+        return scan_items_many(self, patterns, fmt)
 
 
 def run_cmd(
-    cmd_str: str,
+    cmd_str: Union[str, list],
     ignore_rc: Union[int, Iterable] = None,
     ignore_stderr: bool = True,
     exit_on_error: bool = False,
@@ -139,7 +285,8 @@ def run_cmd(
 ):
     """
     Runs a shell command. Can ignore one or more return codes.
-    :param cmd_str: Shell command to run.
+    :param cmd_str: Shell command to run, or a list of arguments to execute
+                    directly without a shell.
     :param ignore_rc: Integer or iterable of integers indicating return
                       codes to ignore, or '*' to ignore all return codes.
     :param ignore_stderr: bool. Ignore any output to stderr.
@@ -149,7 +296,6 @@ def run_cmd(
     :except subprocess.CalledProcessError
     :except ValueError
     """
-    result = None
     ignore = {0}   # Always ignore return code 0.
     if ignore_rc is None:
         pass  # Already ignoring rc 0.
@@ -162,52 +308,88 @@ def run_cmd(
     else:
         raise ValueError(f"Bad value for ignore_rc ({ignore_rc}).")
 
+    #print(f"run_cmd: {cmd_str}")
     try:
-        #print(f"run_cmd: {cmd_str}")
+        # Read raw bytes; most commands print nothing, so only decode what's
+        # left after stripping. Don't collect stderr if nobody will look at it.
         result = subprocess.run(
-            cmd_str, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, env=env
+            cmd_str,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL if ignore_stderr else subprocess.PIPE,
+            shell=isinstance(cmd_str, str),
+            env=env,
+        )
+    except FileNotFoundError:
+        # Without a shell, a missing command raises instead of returning 127.
+        result = subprocess.CompletedProcess(
+            cmd_str, CmdViewer.CMD_NOT_FOUND, stdout=b"", stderr=b""
         )
-    except subprocess.CalledProcessError as e:
-        # "ignore" contains return codes that are not considered errors.
-        # For example: grep will return errno == 1 if it doesn't match any
-        # lines in its input stream.  We want to ignore this case since it's
-        # not really an error. Note: pipelines return the errno of the last command
-        # by default. Use `set -o pipefail` to override this behavior.
-        if ignore and e.returncode not in ignore:
-            if exit_on_error:
-                exit(e.returncode)
-            else:
-                raise subprocess.CalledProcessError(
-                    returncode=e.returncode, cmd=cmd_str
-                )
-    else:
-        if (ignore and result.returncode not in ignore) or (
-            not ignore_stderr and result.stderr
-        ):
-            if exit_on_error:
-                # print(result.stderr)
-                exit(result.returncode if result.returncode != 0 else 1)
-            else:
-                print(f"ignore_rc={ignore_rc}, ignore={ignore}, result.returncode={result.returncode}.")
-                print(f"ignore_stderr={ignore_stderr}, result.stderr={result.stderr}.")
-                raise subprocess.CalledProcessError(
-                    returncode=result.returncode,
-                    cmd=cmd_str,
-                    output=result.stdout,
-                    stderr=result.stderr,
-                )
 
-    return result.stdout.decode().strip()
+    # "ignore" contains return codes that are not considered errors.
+    # For example: grep will return errno == 1 if it doesn't match any
+    # lines in its input stream.  We want to ignore this case since it's
+    # not really an error. Note: pipelines return the errno of the last command
+    # by default. Use `set -o pipefail` to override this behavior.
+    if (ignore and result.returncode not in ignore) or (
+        not ignore_stderr and result.stderr
+    ):
+        if exit_on_error:
+            # print(result.stderr)
+            exit(result.returncode if result.returncode != 0 else 1)
+        else:
+            print(f"ignore_rc={ignore_rc}, ignore={ignore}, result.returncode={result.returncode}.")
+            print(f"ignore_stderr={ignore_stderr}, result.stderr={result.stderr!r}.")
+            raise subprocess.CalledProcessError(
+                returncode=result.returncode,
+                cmd=cmd_str,
+                output=result.stdout,
+                stderr=result.stderr,
+            )
 
+    output = result.stdout.strip()
+    return output.decode("utf-8", errors="replace") if output else ""
 
-class ProcessViewer(PatternCounter):
+
+class ProcessViewer(SharedInstance, PatternCounter):
     """
     Reads in all current processes.
     """
 
+    # Linux truncates the names in /proc/<pid>/comm to this many characters.
+    COMM_LEN = 15
+
     def __init__(self):
         # Read the name of every current process and store it in a Counter.
-        super().__init__([proc.name() for proc in psutil.process_iter(attrs=["name"])])
+        super().__init__(ProcessViewer.read_names())
+
+    @staticmethod
+    def read_names():
+        """
+        Returns the name of every current process. On Linux the names are read
+        straight from /proc, which is much faster than psutil.process_iter.
+        :return: list of str.
+        """
+        if not sys.platform.startswith("linux"):
+            # psutil fetches the attrs up front, skipping processes that exit.
+            return [proc.info["name"] for proc in psutil.process_iter(attrs=["name"])]
+        names = []
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/comm", encoding="utf-8", errors="replace") as fp:
+                    name = fp.read().rstrip("\n")
+                if len(name) == ProcessViewer.COMM_LEN:
+                    # The name may have been truncated. Like psutil, recover the
+                    # full name from the command line.
+                    with open(f"/proc/{pid}/cmdline", encoding="utf-8", errors="replace") as fp:
+                        exe = os.path.basename(fp.read().split("\0", 1)[0])
+                    if exe.startswith(name):
+                        name = exe
+            except OSError:
+                continue  # The process has exited.
+            names.append(name)
+        return names
 
     @staticmethod
     def format(count: int, item: str):
@@ -233,12 +415,15 @@ class ProcessViewer(PatternCounter):
         :param return_tuple: bool (IGNORED).
         :return: list of messages about process names that match `pattern`.
         """
-        results = []
-        if isinstance(pattern, str):
-            pattern = glob_to_regex(pattern)
-        for key, val in super().search(pattern, return_tuple=True):
-            results.extend(ProcessViewer.format(val, key))
-        return results
+        return self.scan(pattern, ProcessViewer.format)
+
+    def search_many(self, patterns: list):
+        """
+        Search for every process name that matches any of `patterns`.
+        :param patterns: list of string globs.
+        :return: dict mapping each glob to a list of messages.
+        """
+        return self.scan_many(patterns, ProcessViewer.format)
 
 
 class OpenFileViewer(PatternCounter):
@@ -246,12 +431,45 @@ class OpenFileViewer(PatternCounter):
     Reads in the names of all open files.
     """
 
+    # Links in /proc/<pid> that lsof also reports, besides the file descriptors.
+    PROC_LINKS = ("cwd", "root", "exe")
+
     def __init__(self):
+        super().__init__(OpenFileViewer.read_names())
+
+    @staticmethod
+    def read_names():
+        """
+        Returns the name of every open file. On Linux the names are read from
+        the links in /proc, which is much faster than running `lsof`.
+        :return: list of str.
+        """
+        if not sys.platform.startswith("linux"):
+            try:
+                output = subprocess.run(
+                    ["lsof", "-b", "-F", "n"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                ).stdout
+            except FileNotFoundError:
+                return []  # `lsof` isn't installed.
+            # Pick out the name fields with one regex sweep over the raw bytes.
+            return [name.decode(errors="replace") for name in _LSOF_NAME_RE.findall(output)]
         names = []
-        for line in run_cmd("lsof -b -F n 2>/dev/null").splitlines():
-            if line[0] == "n":
-                names.append(line[1:])
-        super().__init__(names)
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            links = [f"/proc/{pid}/{link}" for link in OpenFileViewer.PROC_LINKS]
+            try:
+                links.extend(entry.path for entry in os.scandir(f"/proc/{pid}/fd"))
+            except OSError:
+                pass  # The process has exited, or belongs to another user.
+            for link in links:
+                try:
+                    names.append(os.readlink(link))
+                except OSError:
+                    continue
+        return names
 
     @staticmethod
     def format(count: int, item: str):
@@ -272,12 +490,7 @@ class OpenFileViewer(PatternCounter):
         :param return_tuple: bool.
         :return: list of messages about open files that match `pattern`.
         """
-        results = []
-        if isinstance(pattern, str):
-            pattern = glob_to_regex(pattern)
-        for key, val in super().search(pattern, return_tuple=True):
-            results.extend(OpenFileViewer.format(val, key))
-        return results
+        return self.scan(pattern, OpenFileViewer.format)
 
 
 class PackageViewer:
@@ -286,6 +499,19 @@ class PackageViewer:
     """
 
     DB_TABLE = "Packages"
+    DB_INDEX = "idx_packages_name_desc"
+    DB_NOCASE_INDEX = "idx_packages_name_nocase_desc"
+    # Indexes made by older versions, which didn't cover Description.
+    OLD_DB_INDEXES = ("idx_packages_name", "idx_packages_name_nocase")
+    INSERT_SQL = f"INSERT INTO {DB_TABLE} (Name, Type, Description) VALUES (?,?,?)"
+    SELECT_SQL = f"SELECT Name, Description FROM {DB_TABLE} WHERE Name=? ORDER BY id"
+    SELECT_LIKE_SQL = (
+        f"SELECT Name, Description FROM {DB_TABLE} WHERE Name LIKE ? ESCAPE '\\'"
+    )
+    # Stay well below SQLite's limit on the number of bound parameters.
+    MAX_PARAMS = 500
+    # Maximum number of package manager commands run at the same time.
+    MAX_WORKERS = 8
     CONFIG_TABLE = "MyHelp"
     YAML_FILE_VERSION = 1
 
@@ -303,8 +529,18 @@ class PackageViewer:
         :param reload: bool (force reloading of package names into database)
         :param feedback: bool (show a spinner while working)
         """
-        self.conn = sqlite3.connect(db_file)
+        # Memoize lookups so repeated targets don't query the database again.
+        self._get = functools.lru_cache(maxsize=CACHE_SIZE)(self._get)
+        self._search = functools.lru_cache(maxsize=CACHE_SIZE)(self._search)
+        # Autocommit mode: transactions are only opened explicitly.
+        self.conn = sqlite3.connect(db_file, isolation_level=None)
         self.cursor = self.conn.cursor()
+        # Avoid an fsync per write and keep temporary tables in memory.
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA cache_size=-20000")
+        self.cursor.execute("PRAGMA mmap_size=268435456")
         self.cursor.execute(
             "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND "
             f"name = '{PackageViewer.DB_TABLE}'"
@@ -315,6 +551,19 @@ class PackageViewer:
                 "KEY AUTOINCREMENT NOT NULL, Name text, Type text, "
                 "Description text)"
             )
+        for index in PackageViewer.OLD_DB_INDEXES:
+            self.cursor.execute(f"DROP INDEX IF EXISTS {index}")
+        # Lookups by name use the index instead of scanning the table. The
+        # indexes include Description, so queries never have to read the table.
+        self.cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PackageViewer.DB_INDEX} ON "
+            f"{PackageViewer.DB_TABLE} (Name, Description)"
+        )
+        # LIKE is case-insensitive, so it can only use a NOCASE index.
+        self.cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PackageViewer.DB_NOCASE_INDEX} ON "
+            f"{PackageViewer.DB_TABLE} (Name COLLATE NOCASE, Description)"
+        )
         self.cursor.execute(
             "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND "
             f"name = '{PackageViewer.CONFIG_TABLE}'"
@@ -350,32 +599,70 @@ class PackageViewer:
         :param feedback: bool
         :return: None
         """
-        spinner = Spinner() if feedback else None
-        self.cursor.execute(
-            f"DELETE FROM {PackageViewer.DB_TABLE}"
-        )  # Delete all rows from table.
-        with open(config_filename, "r") as fp:
-            pkg_data = yaml.load(fp, Loader=yaml.BaseLoader)
+        # The spinner ticks on its own thread while the package managers run.
+        with Spinner() if feedback else contextlib.nullcontext():
+            pkg_data = PackageViewer.load_config(config_filename)
             # Ensure we recognize the version of the YAML file.
-            assert int(pkg_data["version"]) == PackageViewer.YAML_FILE_VERSION
-            for key, val in pkg_data["packages"].items():
-                # If the command is executable:
-                if run_cmd(f"which {key}", [1]).strip():
-                    # Command should return 1 package name per line.
-                    pkg_list = run_cmd(val["command"]).splitlines()
-                    # Build a list of values to be inserted into the database.
-                    records = [(pkg, key, val["description"]) for pkg in pkg_list]
-                    if spinner:
-                        next(spinner)
-                    self.cursor.executemany(
-                        f"INSERT INTO {PackageViewer.DB_TABLE} (Name, Type, Description) VALUES (?,?,?)",
-                        records,
-                    )
-        self.cursor.execute(f"UPDATE {PackageViewer.CONFIG_TABLE} SET last_update=?, version=? WHERE id=1",
-                            (1, int(pkg_data["version"])))
-        self.conn.commit()
-        if spinner:
-            spinner.stop()
+            assert pkg_data["version"] == PackageViewer.YAML_FILE_VERSION
+            # Only query the package managers that are installed.
+            managers = {key: val for key, val in pkg_data["packages"].items()
+                        if shutil.which(key) is not None}
+            records = []
+            if managers:
+                # The package managers mostly wait on I/O, so run them concurrently.
+                workers = min(PackageViewer.MAX_WORKERS, len(managers))
+                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {key: executor.submit(run_cmd, val["command"])
+                               for key, val in managers.items()}
+                    for key, future in futures.items():
+                        # Command should return 1 package name per line.
+                        pkg_list = future.result().splitlines()
+                        # Build a list of values to be inserted into the database.
+                        description = managers[key]["description"]
+                        records.extend((pkg, key, description) for pkg in pkg_list)
+            # Replace the table's contents in a single transaction. It is rolled
+            # back if anything fails.
+            with self.conn:
+                self.cursor.execute("BEGIN IMMEDIATE")
+                self.cursor.execute(
+                    f"DELETE FROM {PackageViewer.DB_TABLE}"
+                )  # Delete all rows from table.
+                self.cursor.executemany(PackageViewer.INSERT_SQL, records)
+                self.cursor.execute(f"UPDATE {PackageViewer.CONFIG_TABLE} SET last_update=?, version=? WHERE id=1",
+                                    (1, pkg_data["version"]))
+            # Cached lookups refer to the old contents of the database.
+            self._get.cache_clear()
+            self._search.cache_clear()
+
+    @staticmethod
+    def load_config(config_filename: str):
+        """
+        Reads the YAML file `config_filename`. The parsed contents are cached as
+        JSON next to it and reused until the YAML file is modified.
+        :param config_filename: string name of YAML file.
+        :return: dict
+        """
+        cache_filename = config_filename + ".cache.json"
+        try:
+            if os.path.getmtime(cache_filename) >= os.path.getmtime(config_filename):
+                with open(cache_filename, "r") as fp:
+                    return json.load(fp)
+        except (OSError, ValueError):
+            pass  # Missing or corrupt cache: parse the YAML file instead.
+        # PyYAML is slow to import, so only load it when the cache is stale.
+        import yaml
+        # Use the libyaml parser if PyYAML was built with it.
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(config_filename, "r") as fp:
+            pkg_data = yaml.load(fp, Loader=loader)
+        try:
+            # Write to a temporary file first so readers never see a partial cache.
+            with open(cache_filename + ".tmp", "w") as fp:
+                json.dump(pkg_data, fp)
+            os.replace(cache_filename + ".tmp", cache_filename)
+        except OSError:
+            pass  # The cache is optional.
+        return pkg_data
 
     def __getitem__(self, target: str):
         """
@@ -383,10 +670,32 @@ class PackageViewer:
         :param target: string name to search for.
         :return: list of strings.
         """
-        self.cursor.execute(
-            f"SELECT * FROM {PackageViewer.DB_TABLE} WHERE Name=?", (target,)
-        )
-        return [f"{target} is a {record[3]}." for record in self.cursor.fetchall()]
+        return list(self._get(target))
+
+    def _get(self, target: str):
+        self.cursor.execute(PackageViewer.SELECT_SQL, (target,))
+        return [f"{target} is a {record[1]}." for record in self.cursor.fetchall()]
+
+    def lookup(self, targets: list):
+        """
+        Searches the package name database for every name in `targets` with one
+        query per MAX_PARAMS names. Does not accept globs.
+        :param targets: list of string names to search for.
+        :return: dict mapping each target to a list of strings.
+        """
+        results = {target: [] for target in targets}
+        targets = list(results)  # Without duplicates.
+        for start in range(0, len(targets), PackageViewer.MAX_PARAMS):
+            chunk = targets[start:start + PackageViewer.MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            self.cursor.execute(
+                f"SELECT Name, Description FROM {PackageViewer.DB_TABLE} "
+                f"WHERE Name IN ({placeholders}) ORDER BY id",
+                chunk,
+            )
+            for name, description in self.cursor.fetchall():
+                results[name].append(f"{name} is a {description}.")
+        return results
 
     def search(self, target: str):
         """
@@ -394,39 +703,69 @@ class PackageViewer:
         :param target: string name to search for.
         :return: list of strings.
         """
+        return list(self._search(target))
+
+    def _search(self, target: str):
         if "*" in target:
-            target = PackageViewer.glob_to_sql(target)
-        if "%" in target:
             self.cursor.execute(
-                f"SELECT * FROM {PackageViewer.DB_TABLE} WHERE Name LIKE ?", (target,)
+                PackageViewer.SELECT_LIKE_SQL, (PackageViewer.glob_to_sql(target),)
             )
             return [
-                f"{record[1]} is a {record[3]}." for record in self.cursor.fetchall()
+                f"{record[0]} is a {record[1]}." for record in self.cursor.fetchall()
             ]
         else:
-            self.cursor.execute(
-                f"SELECT * FROM {PackageViewer.DB_TABLE} WHERE Name=?", (target,)
-            )
-            return [f"{target} is a {record[3]}." for record in self.cursor.fetchall()]
+            return self._get(target)
 
     @staticmethod
     def glob_to_sql(pattern: str):
-        return pattern.replace("*", "%")
+        """
+        Converts a glob to a LIKE pattern. Characters that LIKE treats specially
+        are escaped with "\\".
+        :param pattern: str glob.
+        :return: str
+        """
+        fragments = []
+        for fragment in split_glob(pattern):
+            for char in ("\\", "%", "_"):
+                fragment = fragment.replace(char, "\\" + char)
+            fragments.append(fragment)
+        return "%".join(fragments)
 
 
-class DeviceViewer:
+class DeviceViewer(SharedInstance):
     """
-    Searches all devices detected by psutil.disk_partitions.
+    Searches all mounted devices.
     """
 
+    MOUNTS_FILE = "/proc/self/mounts"
+
     def __init__(self):
-        self._devices = PatternCounter()
-        self._mount_points = PatternCounter()
-        self._fstypes = PatternCounter()
-        for elt in psutil.disk_partitions(all=True):
-            self._devices.update([elt.device])
-            self._mount_points.update([elt.mountpoint])
-            self._fstypes.update([elt.fstype])
+        partitions = DeviceViewer.read_partitions()
+        # Counting whole iterables is done in C.
+        self._devices = PatternCounter(partition[0] for partition in partitions)
+        self._mount_points = PatternCounter(partition[1] for partition in partitions)
+        self._fstypes = PatternCounter(partition[2] for partition in partitions)
+
+    @staticmethod
+    def read_partitions():
+        """
+        Returns every mounted partition. On Linux the mount table is read
+        straight from /proc, which skips psutil's per-entry wrappers.
+        :return: list of (device, mount point, file system type) str tuples.
+        """
+        if not os.path.exists(DeviceViewer.MOUNTS_FILE):
+            return [(elt.device, elt.mountpoint, elt.fstype)
+                    for elt in psutil.disk_partitions(all=True)]
+        partitions = []
+        with open(DeviceViewer.MOUNTS_FILE, encoding="utf-8", errors="replace") as fp:
+            for line in fp:
+                fields = line.split(" ", 3)
+                if len(fields) == 4:
+                    # Spaces, tabs, etc. are written as octal escapes like "\040".
+                    partitions.append(tuple(_MOUNT_ESCAPE_RE.sub(
+                        lambda match: chr(int(match.group(1), 8)), field)
+                        for field in fields[:3]))
+        return partitions
 
     def __str__(self):
         return "DeviceViewer(" + "\n".join(["_devices: " + str(self._devices),
@@ -464,15 +803,30 @@ class DeviceViewer:
         :param return_tuple: bool (IGNORED).
         :return: list of str.
         """
-        results = []
-        if isinstance(pattern, str):
-            pattern = glob_to_regex(pattern)
-        for key, val in self._devices.search(pattern, return_tuple=True):
-            results.extend(DeviceViewer.format("device", key, val))
-        for key, val in self._fstypes.search(pattern, return_tuple=True):
-            results.extend(DeviceViewer.format("file system type", key, val))
-        for key, val in self._mount_points.search(pattern, return_tuple=True):
-            results.extend(DeviceViewer.format("mount point", key, val))
+        return (
+            self._devices.scan(
+                pattern, lambda val, key: DeviceViewer.format("device", key, val))
+            + self._fstypes.scan(
+                pattern, lambda val, key: DeviceViewer.format("file system type", key, val))
+            + self._mount_points.scan(
+                pattern, lambda val, key: DeviceViewer.format("mount point", key, val))
+        )
+
+    def search_many(self, patterns: list):
+        """
+        Search for devices, file system types and mount points that match any
+        of `patterns`.
+        :param patterns: list of string globs.
+        :return: dict mapping each glob to a list of str.
+        """
+        results = {pattern: [] for pattern in patterns}
+        for counter, category in ((self._devices, "device"),
+                                  (self._fstypes, "file system type"),
+                                  (self._mount_points, "mount point")):
+            matches = counter.scan_many(
+                patterns, lambda val, key: DeviceViewer.format(category, key, val))
+            for pattern in patterns:
+                results[pattern].extend(matches[pattern])
         return results
 
 
@@ -502,45 +856,47 @@ class BuiltInViewer:
         "x": "export",
     }
 
-    def __init__(self, input_file):
+    def __init__(self, input_file, modes=None):
         """
         Reads the results of several Bash built-in commands from `input_file`.
         :param input_file: file-like object to read from.
+        :param modes: set of lowercase command names whose output should be
+                      parsed, or None to parse everything.
         """
         # `results` maps the built-in command to a list of its output.
-        self.results = dict()
-        for cmd in BuiltInViewer.Cmd.__members__.keys():
-            self.results[cmd] = []
-        # Dispatch parsing method based on command type:
-        self._cmd_parser_ = {
-            BuiltInViewer.Cmd.ALIAS.name.lower(): self._parse_alias,
-            BuiltInViewer.Cmd.DECLARE.name.lower(): self._parse_declare,
-            BuiltInViewer.Cmd.SET.name.lower(): self._parse_set,
-            BuiltInViewer.Cmd.TYPE.name.lower(): self._parse_type,
-        }
-        # `_mode_` is the type of command output we are currently parsing.
-        self._mode_ = None
-        # Read `input_file` one line at a time:
-        for line in map(str.rstrip, input_file):
-            self.parse(line)
-
-    def parse(self, line: str):
-        """
-        Parses the `line` string.
-        :param line: string
+        self.results = {cmd.name: [] for cmd in BuiltInViewer.Cmd}
+        self._modes_ = modes
+        # Read all of `input_file` at once and split it at the lines that
+        # indicate the output of a built-in command will follow. This leaves
+        # [text before the first marker, name, output, name, output, ...].
+        sections = _MODE_RE.split(input_file.read())
+        if sections[0]:
+            # We don't know what kind of command output has been read.
+            raise ValueError(sections[0].splitlines()[0])
+        for mode, output in zip(sections[1::2], sections[2::2]):
+            self.parse(mode.lower(), output)
+        # `_index_` maps each label to its messages, in the same order as `results`.
+        self._index_ = PatternDict()
+        for entries in self.results.values():
+            for label, msg in entries:
+                self._index_.setdefault(label, []).append(msg)
+
+    def parse(self, mode: str, output: str):
+        """
+        Parses the `output` of the built-in command `mode`.
+        :param mode: lowercase str name of the command.
+        :param output: multi-line str.
         :return: None
         """
-        # If we have found a line that indicates the output of a built-in command
-        # will follow, then set `_mode_` to the name of that command.
-        if line.startswith("###") and line.endswith("###"):
-            self._mode_ = line.strip("# ").lower()
-        else:
-            # If we don't know what kind of command output has been read:
-            if self._mode_ is None:
-                raise ValueError(line)
-            # `_cmd_parser_` dispatches the correct parsing method.
-            if len(line.strip()) > 0:
-                self._cmd_parser_[self._mode_](line)
+        # Skip the output of commands that can't mention what we look for.
+        if self._modes_ is not None and mode not in self._modes_:
+            return
+        # `_cmd_parser_` dispatches the correct parsing method.
+        parser = BuiltInViewer._cmd_parser_[mode]
+        for line in output.splitlines():
+            line = line.rstrip()
+            if line:
+                parser(self, line)
 
     def _parse_alias(self, line: str):
         """
@@ -548,7 +904,7 @@ class BuiltInViewer:
         :param line: string
         :return: None
         """
-        match = re.search(r"^alias ([^=]*)=(.*)$", line)
+        match = _ALIAS_RE.match(line)
         if match:
             self.results[BuiltInViewer.Cmd.ALIAS.name].append(
                 (match.group(1), f'{match.group(1)} is aliased to {match.group(2)}.')
@@ -562,21 +918,45 @@ class BuiltInViewer:
         :param line: string
         :return: None
         """
-        match = re.search(r"^declare -([^ ]*) ([^ =]*).*$", line)
+        match = _DECLARE_RE.match(line)
         if match:
-            attr_list = []
-            for char in match.group(1):
-                attr_list.append(BuiltInViewer._declare_attr_[char])
-            if None in attr_list:
+            attrs = BuiltInViewer._declare_attrs(match.group(1))
+            if attrs is None:
                 msg = f"{match.group(2)} is a shell variable."
             else:
-                msg = (
-                    f"{match.group(2)} has the attribute(s): "
-                    + ", ".join(attr_list)
-                    + "."
-                )
+                msg = f"{match.group(2)} has the attribute(s): {attrs}."
             self.results[BuiltInViewer.Cmd.DECLARE.name].append((match.group(2), msg))
 
+    @staticmethod
+    def modes_for(terms: list):
+        """
+        Returns the command names whose output could mention one of `terms`.
+        `set` only reports names made of letters, digits and "_", and `declare`
+        names can't contain spaces or "=".
+        :param terms: list of literal str.
+        :return: set of lowercase command names.
+        """
+        modes = {cmd.name.lower() for cmd in BuiltInViewer.Cmd}
+        if not any(_NAME_RE.match(term) for term in terms):
+            modes.discard(BuiltInViewer.Cmd.SET.name.lower())
+        if all(" " in term or "=" in term for term in terms):
+            modes.discard(BuiltInViewer.Cmd.DECLARE.name.lower())
+        return modes
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _declare_attrs(flags: str):
+        """
+        Describes the attribute flags of a `declare` line. Only a handful of flag
+        combinations occur, so each is translated once.
+        :param flags: str such as "ar" or "-".
+        :return: comma separated str of attributes, or None for a plain variable.
+        """
+        attr_list = [BuiltInViewer._declare_attr_[char] for char in flags]
+        if None in attr_list:
+            return None
+        return ", ".join(attr_list)
+
     def _parse_set(self, line: str):
         """
         Parses `set` commands for shell variable and function names. Ignores
@@ -584,19 +964,13 @@ class BuiltInViewer:
         :param line: str
         :return:
         """
-        match = re.search(r"^([a-zA-Z0-9_]+)=", line)
-        if match:
-            self.results[BuiltInViewer.Cmd.SET.name].append(
-                (match.group(1), f"{match.group(1)} is a shell variable.")
-            )
-            return
-
-        match = re.search(r"^([a-zA-Z0-9_]+) \(\)", line)
+        # Most lines are function bodies, so test both forms with one regex.
+        match = _SET_RE.match(line)
         if match:
+            kind = "variable" if match.group(2) else "function"
             self.results[BuiltInViewer.Cmd.SET.name].append(
-                (match.group(1), f"{match.group(1)} is a shell function.")
+                (match.group(1), f"{match.group(1)} is a shell {kind}.")
             )
-            return
 
     def _parse_type(self, line: str):
         """
@@ -604,7 +978,7 @@ class BuiltInViewer:
         :param line:
         :return:
         """
-        match = re.search(r"^([^ ]*) is (.*)$", line)
+        match = _TYPE_RE.match(line)
         if match:
             self.results[BuiltInViewer.Cmd.ALIAS.name].append(
                 (match.group(1), f"{match.group(1)} is {match.group(2)}.")
@@ -612,19 +986,21 @@ class BuiltInViewer:
             return
         raise ValueError(line)
 
+    # Dispatch parsing method based on command type:
+    _cmd_parser_ = {
+        Cmd.ALIAS.name.lower(): _parse_alias,
+        Cmd.DECLARE.name.lower(): _parse_declare,
+        Cmd.SET.name.lower(): _parse_set,
+        Cmd.TYPE.name.lower(): _parse_type,
+    }
+
     def __getitem__(self, target: str):
         """
         Search all results for `target`.
         :param target: string name to search for.
         :return: list of strings.
         """
-        retval = []
-        # Iterate over shell command names.
-        for key in self.results.keys():
-            retval.extend(
-                [msg for (label, msg) in self.results[key] if label == target]
-            )
-        return retval
+        return list(self._index_.get(target, []))
 
     def search(self, pattern):
         """
@@ -632,15 +1008,16 @@ class BuiltInViewer:
         :param pattern: regex or string glob to search for.
         :return: list of strings.
         """
-        retval = []
-        if isinstance(pattern, str):
-            pattern = glob_to_regex(pattern)
-        # Iterate over shell command names.
-        for key in self.results.keys():
-            retval.extend(
-                [msg for (label, msg) in self.results[key] if pattern.search(label)]
-            )
-        return retval
+        # Each distinct label is only matched once.
+        return [msg for msgs in self._index_.search(pattern) for msg in msgs]
+
+    def search_many(self, patterns: list):
+        """
+        Search all results for several globs at once.
+        :param patterns: list of string globs.
+        :return: dict mapping each glob to a list of str.
+        """
+        return self._index_.scan_many(patterns, lambda msgs, label: msgs)
 
 
 class CmdViewer:
@@ -659,21 +1036,39 @@ class CmdViewer:
         ignore_stderr: bool,
         function,
         glob_able: bool,
+        batch_key=None,
+        applicable=None,
     ):
         """
         Create CmdViewer object.
         :param cmd_name: str name of command to run.
-        :param cmd_string: str to pass to shell.
+        :param cmd_string: str to pass to shell, or list of arguments to run
+                           without a shell. A "%s" argument is replaced by the
+                           target(s). None if a subclass answers in-process.
         :param ignore_rc: list of return codes or single return code to ignore.
         :param ignore_stderr: bool. Don't report error if stderr contains message.
         :param function: function to format results of shell command.
         :param glob_able: bool. Can pass a glob for pattern matching.
+        :param batch_key: function that returns the target an output line belongs
+                          to, or None if the command only accepts one target.
+                          Targets that don't map to themselves aren't batched.
+        :param applicable: function that returns False for targets the command
+                           can't find anything for, or None to try every target.
         """
         self.cmd_name = cmd_name
         self.cmd_string = cmd_string
+        if isinstance(cmd_string, list):
+            # Split the argument list around the targets' slot once, up front.
+            slot = cmd_string.index("%s")
+            self._argv_head = list(cmd_string[:slot])
+            self._argv_tail = list(cmd_string[slot + 1:])
         self.ignore_stderr = ignore_stderr
         self.fn = function
         self.glob_able = glob_able
+        self.batch_key = batch_key
+        self.applicable = applicable
+        # Memoize lookups so repeated targets don't run the command again.
+        self._get = functools.lru_cache(maxsize=CACHE_SIZE)(self._get)
         if ignore_rc == "*":
             self.ignore_rc = "*"
         elif isinstance(ignore_rc, collections.abc.Iterable):
@@ -697,14 +1092,57 @@ class CmdViewer:
         :param target: str.
         :return: list of str.
         """
-        # Escape the shell command before running it.
+        if self.applicable is not None and not self.applicable(target):
+            return []
+        return list(self._get(target))
+
+    def _get(self, target: str):
         result = run_cmd(
-            self.cmd_string % shlex.quote(target),
+            self.command([target]),
             ignore_rc=self.ignore_rc,
             ignore_stderr=self.ignore_stderr,
         )
         return self.fn(target, result)
 
+    def command(self, targets: list, quote=shlex.quote):
+        """
+        Builds the command to run for `targets`.
+        :param targets: list of str.
+        :param quote: function to escape each target for the shell.
+        :return: str for the shell or list of arguments.
+        """
+        if isinstance(self.cmd_string, str):
+            # Escape the shell command before running it.
+            return self.cmd_string % " ".join(map(quote, targets))
+        return self._argv_head + list(targets) + self._argv_tail
+
+    def lookup(self, targets: list):
+        """
+        Search for every literal string in `targets`. If the command accepts
+        several targets, it is only run once.
+        :param targets: list of str.
+        :return: dict mapping each target to a list of str.
+        """
+        if self.batch_key is None:
+            return {target: self[target] for target in targets}
+        # Targets that wouldn't be recognized in the output are run on their own.
+        batch = [target for target in targets if self.batch_key(target) == target
+                 and (self.applicable is None or self.applicable(target))]
+        if len(batch) < 2:
+            return {target: self[target] for target in targets}
+        result = run_cmd(
+            self.command(batch),
+            ignore_rc=self.ignore_rc,
+            ignore_stderr=self.ignore_stderr,
+        )
+        # Split the combined output back into the lines for each target.
+        lines = collections.defaultdict(list)
+        for line in result.splitlines():
+            lines[self.batch_key(line)].append(line)
+        batched = set(batch)
+        return {target: self.fn(target, "\n".join(lines[target])) if target in batched
+                else self[target] for target in targets}
+
     def search(self, pattern: str):
         """
         If this command accepts globs, search for `pattern`.
@@ -712,9 +1150,19 @@ class CmdViewer:
         :return:
         """
         if self.glob_able:
-            #print(f"search: pattern={self.cmd_string % escape_glob(pattern)}")
+            if isinstance(self.cmd_string, str):
+                # Let the shell expand the glob.
+                cmd = self.command([pattern], quote=escape_glob)
+            else:
+                targets = expand_glob(pattern)
+                if self.applicable is not None:
+                    targets = list(filter(self.applicable, targets))
+                    if not targets:
+                        return []
+                cmd = self.command(targets)
+            #print(f"search: pattern={cmd}")
             result = run_cmd(
-                self.cmd_string % escape_glob(pattern),
+                cmd,
                 ignore_rc=self.ignore_rc,
                 ignore_stderr=self.ignore_stderr,
             )
@@ -723,49 +1171,321 @@ class CmdViewer:
             raise ValueError(f'Pattern search not allowed for "{self.cmd_name}".')
 
 
+class EntViewer(CmdViewer):
+    """
+    Looks names up in a `getent` database. Names listed in the database's file
+    under /etc are found without running `getent`; it's only run for the rest,
+    and only if the name service also consults other sources.
+    """
+
+    ENT_DIR = "/etc"
+    NSSWITCH_FILE = "/etc/nsswitch.conf"
+
+    def __init__(self, database: str, noun: str, batch_key=None, applicable=None):
+        """
+        Create EntViewer object.
+        :param database: str name of `getent` database ("passwd", "hosts", etc.).
+        :param noun: str describing an entry of the database ("user", "host", etc.).
+        :param batch_key: see CmdViewer.
+        :param applicable: see CmdViewer.
+        """
+        super().__init__(f"getent {database}", ["getent", database, "%s"], 2, True,
+                         self.format, False, batch_key, applicable)
+        self.database = database
+        self.noun = noun
+        # Both are read the first time a name is looked up. `_names` is set last,
+        # once both are complete, so other threads can test it without the lock.
+        self._names = None
+        self._files_only = False
+        self._lock = threading.Lock()
+
+    def format(self, target: str, result: str):
+        return [f"There is a {self.noun} named {target}."] if result else []
+
+    def _load(self):
+        """
+        Reads the names in the database's file, and whether the name service
+        uses any other source for the database.
+        :return: None
+        """
+        names = set()
+        files_only = False
+        backends = ["files"]  # The default if there's no nsswitch.conf.
+        try:
+            with open(EntViewer.NSSWITCH_FILE, encoding="utf-8", errors="replace") as fp:
+                for line in fp:
+                    name, _, sources = line.split("#", 1)[0].partition(":")
+                    if name.strip() == self.database:
+                        # Drop actions such as "[NOTFOUND=return]".
+                        backends = [word for word in sources.split()
+                                    if not word.startswith("[")]
+        except OSError:
+            pass
+        if "files" in backends:
+            try:
+                with open(os.path.join(EntViewer.ENT_DIR, self.database),
+                          encoding="utf-8", errors="replace") as fp:
+                    for line in fp:
+                        names.update(self.keys(line))
+                files_only = backends == ["files"]
+            except OSError:
+                pass
+        self._files_only = files_only
+        self._names = names
+
+    def keys(self, line: str):
+        """
+        Returns every key that `getent` would find a line of the database file by.
+        :param line: str from the database file.
+        :return: list of str.
+        """
+        if self.database in ("passwd", "group"):
+            # name:password:ID:... Lines starting with "+" or "-" refer to NIS.
+            fields = line.rstrip("\n").split(":")
+            if len(fields) < 3 or line[0] in "+-":
+                return []
+            return [fields[0], fields[2]]
+        fields = line.split("#", 1)[0].split()
+        if self.database == "hosts":
+            # address name aliases... Host names aren't case sensitive.
+            return [field.lower() for field in fields]
+        if self.database == "services" and len(fields) >= 2:
+            # name port/protocol aliases...
+            names = [fields[0]] + fields[2:]
+            port, _, protocol = fields[1].partition("/")
+            return names + [port, fields[1]] + [f"{name}/{protocol}" for name in names]
+        return []
+
+    def _find(self, target: str):
+        if self._names is None:
+            with self._lock:
+                if self._names is None:
+                    self._load()
+        return (target.lower() if self.database == "hosts" else target) in self._names
+
+    def _get(self, target: str):
+        if self._find(target):
+            return self.format(target, target)
+        if self._files_only:
+            return []
+        return super()._get(target)
+
+    def lookup(self, targets: list):
+        """
+        Search for every literal string in `targets`. `getent` is only run for
+        the names that aren't in the database file.
+        :param targets: list of str.
+        :return: dict mapping each target to a list of str.
+        """
+        results = {}
+        missing = []
+        for target in targets:
+            if self.applicable is not None and not self.applicable(target):
+                results[target] = []
+            elif self._find(target):
+                results[target] = self.format(target, target)
+            elif self._files_only:
+                results[target] = []
+            else:
+                missing.append(target)
+        if missing:
+            results.update(super().lookup(missing))
+        return {target: results[target] for target in targets}
+
+
+class WhichViewer(CmdViewer):
+    """
+    Finds every command called `target` on the PATH, the way `which -a` does,
+    without running `which`.
+    """
+
+    def __init__(self, function):
+        """
+        Create WhichViewer object.
+        :param function: function to format results of the `which` command.
+        """
+        super().__init__("which", None, 1, True, function, False)
+
+    @staticmethod
+    def is_executable(path: str):
+        return os.path.isfile(path) and os.access(path, os.X_OK)
+
+    def _get(self, target: str):
+        if "/" in target:
+            paths = [target] if WhichViewer.is_executable(target) else []
+        else:
+            # Like `which`, treat an empty PATH element as the current directory.
+            path_var = os.environ.get("PATH", "")
+            elements = path_var.split(os.pathsep) if path_var else []
+            paths = [f"{element or '.'}/{target}" for element in elements
+                     if WhichViewer.is_executable(f"{element or '.'}/{target}")]
+        return self.fn(target, "\n".join(paths))
+
+
+class FileTypeViewer(CmdViewer):
+    """
+    Describes the type of each file. Plain directories are recognized with
+    `lstat`; `file` is only run for everything else.
+    """
+
+    def __init__(self, function):
+        """
+        Create FileTypeViewer object.
+        :param function: function to format results of the `file` command.
+        """
+        super().__init__("file", ["file", "%s"], "*", True, function, True,
+                         lambda line: line.split(":", 1)[0], os.path.lexists)
+
+    @staticmethod
+    def is_plain_dir(path: str):
+        # `file` doesn't follow symbolic links, so don't follow them either. It
+        # also reports setuid, setgid and sticky bits, so leave those dirs to it.
+        try:
+            mode = os.lstat(path).st_mode
+        except OSError:
+            return False
+        return stat.S_ISDIR(mode) and not mode & (stat.S_ISVTX | stat.S_ISGID | stat.S_ISUID)
+
+    def _get(self, target: str):
+        if FileTypeViewer.is_plain_dir(target):
+            return [f"{target} is a directory."]
+        return super()._get(target)
+
+    def lookup(self, targets: list):
+        """
+        Search for every literal string in `targets`. `file` is run once for
+        all the targets that aren't plain directories.
+        :param targets: list of str.
+        :return: dict mapping each target to a list of str.
+        """
+        files = [target for target in targets if not FileTypeViewer.is_plain_dir(target)]
+        results = super().lookup(files)
+        return {target: results[target] if target in results else self[target]
+                for target in targets}
+
+    def search(self, pattern: str):
+        """
+        Describe every file matching `pattern`.
+        :param pattern: str (may be a glob).
+        :return: list of str.
+        """
+        targets = expand_glob(pattern)
+        results = self.lookup(targets)
+        return [msg for target in targets for msg in results[target]]
+
+
+class FileSystemViewer(CmdViewer):
+    """
+    Reports the file system that each file is on. The mount table is read
+    once, rather than running `df` for every file.
+    """
+
+    def __init__(self):
+        super().__init__("df", None, "*", True, None, True,
+                         applicable=os.path.exists)
+        self._mounts = None
+
+    def _get(self, target: str):
+        if self._mounts is None:
+            # Sort by mount point length, so the first match is the longest. The
+            # sort is stable, so later mounts over the same point still win.
+            self._mounts = sorted(reversed(DeviceViewer.read_partitions()),
+                                  key=lambda partition: -len(partition[1]))
+        path = os.path.realpath(target)
+        for device, mount_point, fstype in self._mounts:
+            if path == mount_point or \
+                    path.startswith(mount_point.rstrip("/") + "/"):
+                return [f"{target} is on filesystem {device} (type {fstype})."]
+        return []
+
+    def search(self, pattern: str):
+        """
+        Search for the file system of every file matching `pattern`.
+        :param pattern: str (may be a glob).
+        :return: list of str.
+        """
+        return [msg for target in expand_glob(pattern) for msg in self[target]]
+
+
+@functools.lru_cache(maxsize=1024)
 def glob_to_regex(pattern: str):
     """
     Convert a string to a regex. If `pattern` contains "*", it is a glob.
+    Compiled regexes are cached, so repeated searches reuse them.
     :param pattern: str (may be glob).
     :return: regex
     """
-    if "*" in pattern:
-        # Replace all "*" with ".*". *** DOESN'T HANDLE ESCAPED "*" ***
-        clean_pat = ".*".join(map(re.escape, pattern.split("*")))
-    else:
-        clean_pat = re.escape(pattern)
+    # Replace all unescaped "*" with ".*".
+    fragments = split_glob(pattern)
+    clean_pat = ".*".join(map(re.escape, fragments))
     if DEBUG:
         print(f"glob_to_regex: {pattern} -> {clean_pat}")
-    return re.compile("^" + clean_pat + "$")
+    # "\Z", unlike "$", doesn't also match before a trailing newline.
+    regex = re.compile("^" + clean_pat + r"\Z")
+    return regex
 
 
-def escape_glob(string: str):
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def glob_to_regex_many(patterns: tuple):
     """
-    Escape a file name that may contain globs without escaping the '*' characters themselves.
-    :param string: str
-    :return: str
+    Convert several globs into one regex that matches any of them.
+    :param patterns: tuple of str (may be globs).
+    :return: regex
+    """
+    return re.compile("|".join(glob_to_regex(pattern).pattern for pattern in patterns))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def split_glob(pattern: str):
+    """
+    Split a glob on its unescaped "*" characters. A "\\" escapes the character
+    after it, and is dropped, so r"a\\*b" is the literal text "a*b".
+    :param pattern: str (may be glob).
+    :return: tuple of literal str fragments, one more than the number of globs.
     """
-    split_pts = []
+    substrs = []
+    chars = []
     escape_on = False
-    # Search string for unescaped *'s:
-    for ind in range(len(string)):
-        chr = string[ind]
+    # Split string on unescaped *'s in a single pass:
+    for char in pattern:
         if escape_on:
             escape_on = False
-        elif chr == r'\\':
+        elif char == "\\":
             escape_on = True
-        elif chr == r'*':
-            split_pts.append(ind)   # Found an unescaped "*". Record its index.
-    substrs = []
-    prev = 0
-    # Split string into substrings based on split_pts:
-    for ind in split_pts:
-        substrs.append(string[prev:ind])
-        prev = ind + 1
+            continue
+        elif char == "*":
+            # Found an unescaped "*". End the current substring.
+            substrs.append("".join(chars))
+            chars.clear()
+            continue
+        chars.append(char)
     # Append the trailing substring:
-    substrs.append(string[prev:])
+    substrs.append("".join(chars))
+    return tuple(substrs)
+
+
+def escape_glob(string: str):
+    """
+    Escape a file name that may contain globs without escaping the '*' characters themselves.
+    :param string: str
+    :return: str
+    """
     # Use `shlex.quote` on every substring, then glue together with "*":
-    return "*".join(map(shlex.quote, substrs))
+    return "*".join(map(shlex.quote, split_glob(string)))
+
+
+def expand_glob(pattern: str):
+    """
+    Expand the "*" characters in `pattern` into the matching file names, the way
+    the shell would. If nothing matches, `pattern` is returned unchanged.
+    :param pattern: str (may be glob).
+    :return: list of str.
+    """
+    fragments = split_glob(pattern)
+    # Only "*" is a glob character; escape everything else.
+    paths = sorted(glob.glob("*".join(map(glob.escape, fragments))))
+    # Like the shell, pass an unmatched glob on without its escapes.
+    return paths if paths else ["*".join(fragments)]
 
 
 def escape_space(string: str):
@@ -776,22 +1496,7 @@ def escape_space(string: str):
     """
     if not string or " " not in string:
         return string
-
-    length = len(string)
-    if length == 1:
-        return r"\ " if string == " " else string
-
-    result = ""
-    if string[0] == " ":
-        result = "\\"
-    for ind in range(length - 1):
-        if string[ind] != "\\" and string[ind + 1] == " ":
-            result += string[ind] + "\\"
-        else:
-            result += string[ind]
-    result += string[-1]
-
-    return result
+    return _UNESCAPED_SPACE_RE.sub(r"\\ ", string)
 
 
 def a_or_an(word: str, lowercase: bool = True):
@@ -802,16 +1507,9 @@ def a_or_an(word: str, lowercase: bool = True):
     :param lowercase: bool
     :return: str
     """
-    if lowercase:
-        a = "a"
-        an = "an"
-    else:
-        a = "A"
-        an = "An"
-    if word[0].lower() in ["a", "e", "i", "o", "u"]:
-        return an
-    else:
-        return a
+    if word[0] in _VOWELS:
+        return "an" if lowercase else "An"
+    return "a" if lowercase else "A"
 
 
 def print_results(results, term):
@@ -845,7 +1543,7 @@ def init_cmd_viewers():
         retval = []
         lines = result.splitlines()
         for line in lines:
-            match = re.search(r"^([^:]*):\s+(.*)$", line)
+            match = _FILE_RE.match(line)
             if match:
                 target = match.group(1)
                 is_a = match.group(2)
@@ -858,26 +1556,6 @@ def init_cmd_viewers():
                     retval.append(f"{target} is {article} {is_a} file.")
         return retval
 
-    def df(token: str, result: str):
-        """
-        Process the results of a `df` command.
-        :param token: str to examine.
-        :param result: multi-line str returned by `df` command.
-        :return: list of str.
-        """
-        # Accepts globs
-        retval = []
-        lines = result.splitlines()
-        if lines:
-            col2_index = lines[0].find("Filesystem")
-            col3_index = lines[0].find("Type")
-            for line in lines[1:]:
-                filename = line[:col2_index].strip()
-                filesys = line[col2_index:col3_index].strip()
-                filetype = line[col3_index:].strip()
-                retval.append(f"{filename} is on filesystem {filesys} (type {filetype}).")
-        return retval
-
     def which(token: str, result: str):
         """
         Process the results of a `which` command.
@@ -891,70 +1569,112 @@ def init_cmd_viewers():
             retval.append(f"{token} is the command {line}.")
         return retval
 
+    # The working directory doesn't change, so don't look it up for every path.
+    cwd = os.getcwd()
+
+    def getent_key(line: str):
+        """
+        Find the name a line of `getent passwd` or `getent group` belongs to.
+        :param line: str returned by `getent`.
+        :return: str, or None for a numeric ID, which matches by number instead.
+        """
+        if line.isdigit():
+            return None
+        return line.split(":", 1)[0]
+
     def info(token: str, result: str):
-        if token.strip() == "" or result in ["", "dir", "*manpages*"]:
+        if token.strip() == "" or result in _INFO_NOT_FOUND:
             return []
-        if os.path.abspath(token) == os.path.abspath(result):
+        # `info` echoes back a file name that it was given, rather than a manual.
+        # Usually it's echoed verbatim, so compare the strings before the paths.
+        if token == result or os.path.normpath(os.path.join(cwd, token)) == \
+                os.path.normpath(os.path.join(cwd, result)):
             return []
         return [f"{token} has an info page."]
 
     viewers = [
-        CmdViewer(
-            "getent passwd",
-            "getent passwd %s",
-            2,
-            True,
-            lambda target, result: [f"There is a user named {target}."] if result else [],
-            False,
-        ),
-        CmdViewer(
-            "getent group",
-            "getent group %s",
-            2,
-            True,
-            lambda target, result: [f"There is a group named {target}."] if result else [],
-            False,
-        ),
-        CmdViewer(
-            "getent hosts",
-            "getent hosts %s",
-            2,
-            True,
-            lambda target, result: [f"There is a host named {target}."] if result else [],
-            False,
-        ),
-        CmdViewer(
-            "getent services",
-            "getent services %s",
-            2,
-            True,
-            lambda target, result: [f"There is a service named {target}."] if result else [],
-            False,
-        ),
-        CmdViewer("file", "file %s", "*", True, file, True),
+        EntViewer("passwd", "user", getent_key),
+        EntViewer("group", "group", getent_key),
+        EntViewer("hosts", "host", applicable=lambda target: "/" not in target),
+        EntViewer("services", "service"),
+        FileTypeViewer(file),
         CmdViewer(
             "xdg-mime",
-            "xdg-mime query filetype %s 2>/dev/null",
+            ["xdg-mime", "query", "filetype", "%s"],
             "*",
             True,
             lambda target, result: [f"{target} has the MIME type {result}."] if result else [],
             False,  # No globs
+            applicable=os.path.lexists,
         ),
-        CmdViewer("df", "df --output=file,source,fstype %s 2>/dev/null", "*", True, df, True),
-        CmdViewer("info", "info -w %s", [], True, info, False),
+        FileSystemViewer(),
+        CmdViewer("info", ["info", "-w", "%s"], [], True, info, False),
         CmdViewer(
             "man",
-            "man --whatis %s 2>/dev/null",
+            ["man", "--whatis", "%s"],
             16,
             True,
             lambda target, result: [f"{target} has a man page."] if bool(result) else [],
             False,
+            # Lines look like "ls (1) - list directory contents".
+            lambda line: line.split(" ", 1)[0].lower(),
         ),
-        CmdViewer("which", "which -a %s 2>/dev/null", 1, True, which, False),
+        WhichViewer(which),
     ]
     return viewers
 
 
+def lookup_all(viewers: list, targets: list):
+    """
+    Runs every CmdViewer on every target concurrently. The commands spend most
+    of their time waiting on the OS, so threads overlap them.
+    :param viewers: list of CmdViewer.
+    :param targets: list of str.
+    :return: list with one dict per viewer, mapping each target to a list of str.
+    """
+    results = [dict() for _ in viewers]
+    if not targets:
+        return results
+    workers = min(MAX_WORKERS, len(viewers) * len(targets))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for result, viewer in zip(results, viewers):
+            # Commands that accept several targets are still only run once.
+            if viewer.batch_key is None:
+                chunks = [[target] for target in targets]
+            else:
+                chunks = [targets]
+            for chunk in chunks:
+                futures.append((result, executor.submit(viewer.lookup, chunk)))
+        for result, future in futures:
+            result.update(future.result())
+    return results
+
+
+def search_all(viewers: list, patterns: list):
+    """
+    Runs every glob-able CmdViewer on every pattern concurrently.
+    :param viewers: list of CmdViewer. Viewers that can't search globs are skipped.
+    :param patterns: list of str globs.
+    :return: list with one dict per glob-able viewer, mapping each pattern to a
+             list of str.
+    """
+    viewers = [viewer for viewer in viewers if viewer.glob_able]
+    results = [dict() for _ in viewers]
+    if not (viewers and patterns):
+        return results
+    workers = min(MAX_WORKERS, len(viewers) * len(patterns))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (result, pattern, executor.submit(viewer.search, pattern))
+            for result, viewer in zip(results, viewers)
+            for pattern in patterns
+        ]
+        for result, pattern, future in futures:
+            result[pattern] = future.result()
+    return results
+
+
 if __name__ == "__main__":
     cmd_viewers = init_cmd_viewers()
     no_patterns = sorted([cmd.cmd_name for cmd in cmd_viewers if not cmd.glob_able])
@@ -1000,6 +1720,13 @@ following commands:\n""" + textwrap.indent(textwrap.fill(", ".join(no_patterns))
         default=False,
         help="Show spinner when refreshing package cache.",
     )
+    parser.add_argument(
+        "-q",
+        "--quick",
+        action="store_true",
+        default=False,
+        help="Skip the slower command checks for names that were already found.",
+    )
     parser.add_argument(
         "terms", metavar="NAME", type=str, nargs="*", help="Object to identify."
     )
@@ -1015,14 +1742,20 @@ following commands:\n""" + textwrap.indent(textwrap.fill(", ".join(no_patterns))
     refresh = args.refresh or int(os.environ["MYHELP_REFRESH"]) == 1
     if args.pattern is None:
         args.pattern = []
+    terms = [term.strip("'") for term in args.terms]
+    terms = [term for term in terms if term != ""]
 
     # Initialize viewers:
-    if args.standalone:
+    if args.standalone or not (terms or args.pattern):
+        # Don't bother parsing the shell builtins if nothing will be searched.
         builtins = None
-    else:
+    elif args.pattern:
         builtins = BuiltInViewer(sys.stdin)
-    processes = ProcessViewer()
-    devices = DeviceViewer()
+    else:
+        # Only parse the output of commands that could mention the terms.
+        builtins = BuiltInViewer(sys.stdin, BuiltInViewer.modes_for(terms))
+    processes = ProcessViewer.instance()
+    devices = DeviceViewer.instance()
     # open_files = OpenFileViewer()
     packages = PackageViewer(
         db_file, yaml_file, reload=refresh, feedback=args.interactive
@@ -1030,48 +1763,60 @@ following commands:\n""" + textwrap.indent(textwrap.fill(", ".join(no_patterns))
 
     got_results = False
 
-    for pattern in args.pattern:
+    patterns = [pattern.strip("'") for pattern in args.pattern]
+    patterns = [pattern for pattern in patterns if pattern != ""]
+    # Match all patterns against devices and processes in one pass each:
+    device_matches = devices.search_many(patterns)
+    process_matches = processes.search_many(patterns)
+    # Run the commands for all patterns at once:
+    glob_results = search_all(cmd_viewers, patterns)
+    builtin_matches = builtins.search_many(patterns) if builtins else {}
+
+    for pattern in patterns:
         # Scan for each search pattern (glob):
         if DEBUG:
             print(f"Checking pattern {pattern}")
-        pattern = pattern.strip("'")
-        if pattern == "":
-            continue
         got_results = True
-        patt_re = glob_to_regex(pattern)
-        results = (
-            packages.search(pattern)
-            + devices.search(patt_re)
-            + processes.search(patt_re)
-            # + open_files.search(patt_re)
-        )
-        for viewer in cmd_viewers:
-            if viewer.glob_able:
-                results.extend(viewer.search(pattern))
-        if builtins:
-            results.extend(builtins.search(patt_re))
+        # Build the list of results in one go, rather than one copy per viewer.
+        results = list(itertools.chain(
+            packages.search(pattern),
+            device_matches[pattern],
+            process_matches[pattern],
+            # open_files.search(pattern),
+            *(viewer_results[pattern] for viewer_results in glob_results),
+            builtin_matches.get(pattern, []),
+        ))
         print_results(results, pattern)
 
-    for term in args.terms:
-        term = term.strip("'")
-        if term == "":
-            continue
+    # Look up all terms at once:
+    unique_terms = list(dict.fromkeys(terms))
+    pkg_results = packages.lookup(unique_terms)
+    if args.quick:
+        # Only run commands for terms that the cheaper checks didn't find.
+        probe_terms = [
+            term for term in unique_terms
+            if not (pkg_results[term] or devices[term] or processes[term]
+                    or (builtins and builtins[term]))
+        ]
+    else:
+        probe_terms = unique_terms
+    cmd_results = lookup_all(cmd_viewers, probe_terms)
+
+    for term in terms:
         got_results = True
         if "*" in term:
             print(
                 f'WARNING: Treating "*" in "{term}" as a literal character, not a glob.'
             )
         # Scan for each search term:
-        results = (
-            packages[term]
-            + devices[term]
-            + processes[term]
-            # + open_files[term]
-        )
-        for viewer in cmd_viewers:
-            results.extend(viewer[term])
-        if builtins:
-            results.extend(builtins[term])
+        results = list(itertools.chain(
+            pkg_results[term],
+            devices[term],
+            processes[term],
+            # open_files[term],
+            *(viewer_results.get(term, []) for viewer_results in cmd_results),
+            builtins[term] if builtins else [],
+        ))
         print_results(results, term)
 
     if not refresh and not got_results:
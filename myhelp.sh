@@ -84,8 +84,8 @@ if [[ $? -ne 4 ]]; then
 fi
 
 # Parse commandline options:
-OPTIONS='hDrp:siT:'
-LONGOPTIONS='help,DEBUG,refresh,pattern:,standalone,interactive,TEST:'
+OPTIONS='hDrp:siqT:'
+LONGOPTIONS='help,DEBUG,refresh,pattern:,standalone,interactive,quick,TEST:'
 
 PARSED=$(getopt --options="${OPTIONS}" --longoptions="${LONGOPTIONS}" --name "$0" -- "$@")
 if [[ $? -ne 0 ]]; then
@@ -134,7 +134,8 @@ while [[ $# -ne 0 ]]; do
                 # Use `type` built-in.
                 retval=$(type -a "$1" 2>/dev/null)
                 if [[ $? -eq 0 ]]; then
-                    echo "$retval" | head -1 >> "${temp_file}"
+                    # Keep the first line without forking `head`.
+                    echo "${retval%%$'\n'*}" >> "${temp_file}"
                 fi
                 shift
             done
@@ -152,7 +153,8 @@ while [[ $# -ne 0 ]]; do
             # Use `type` built-in.
             retval=$(type -a "$1" 2>/dev/null)
             if [[ $? -eq 0 ]]; then
-                echo "$retval" | head -1 >> "${temp_file}"
+                # Keep the first line without forking `head`.
+                echo "${retval%%$'\n'*}" >> "${temp_file}"
             fi
             shift
             ;;
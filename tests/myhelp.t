@@ -26,7 +26,7 @@ Check other installation files:
 
 Check help:
   $ . "${MYHELP_BIN_DIR}/myhelp.sh" -T "${MYHELP_BIN_DIR}" -h
-  usage: * [-h] [-D] [-r] [-p PATTERN] [-s] [-i] [NAME ...] (glob)
+  usage: * [-h] [-D] [-r] [-p PATTERN] [-s] [-i] [-q] [NAME ...] (glob)
   
   Identifies the names provided.  Tries every test imaginable.  Looks for:
   man pages, info pages, executables in PATH, aliases, shell variables, running
@@ -45,6 +45,8 @@ Check help:
                           in quotes.
     -s, --standalone      Don't read shell builtins.
     -i, --interactive     Show spinner when refreshing package cache.
+    -q, --quick           Skip the slower command checks for names that were
+                          already found.
   
   Pattern searches use "globs". Pattern searches cannot be performed with the
   following commands:
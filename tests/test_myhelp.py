@@ -26,9 +26,12 @@
 
 import pytest
 import collections
+import concurrent.futures
+import io
 import myhelp
 import re
 import sys
+import tempfile
 import os
 
 
@@ -40,6 +43,8 @@ E_PATTERN = myhelp.glob_to_regex("*e")
 
 def test_run_cmd():
     assert myhelp.run_cmd("echo 'Hello'", ignore_stderr=False) == "Hello"
+    assert myhelp.run_cmd(["echo", "Hello World"], ignore_stderr=False) == "Hello World"
+    assert myhelp.run_cmd(["qwertyuiop"], ignore_rc=127) == ""
 
 
 def test_PatternDict():
@@ -47,6 +52,9 @@ def test_PatternDict():
     assert pd["baker"] == 3
     assert set(pd.search(A_PATTERN)) == {1, 2}
     assert set(pd.search(E_PATTERN)) == {1, 2, 7}
+    assert set(pd.search("*pl*")) == {1, 7}
+    assert myhelp.compile_pattern(r"a*b\*cd*") == (myhelp.glob_to_regex(r"a*b\*cd*"), "b*cd")
+    assert myhelp.compile_pattern(A_PATTERN) == (A_PATTERN, "")
 
 
 def test_PatternCounter():
@@ -59,10 +67,13 @@ def test_PatternCounter():
 def test_ProcessViewer():
     pv = myhelp.ProcessViewer()
     assert re.search(r"There are [0-9]+ processes called .*", pv["bash"][0])
+    assert myhelp.ProcessViewer.instance() is myhelp.ProcessViewer.instance()
 
 
-#def test_OpenFileViewer():
-#    assert False
+def test_OpenFileViewer():
+    with open(__file__):
+        assert os.path.abspath(__file__) in myhelp.OpenFileViewer.read_names()
+    assert myhelp.OpenFileViewer()["/"] != []
 
 
 def test_PackageViewer():
@@ -70,32 +81,112 @@ def test_PackageViewer():
     yaml_file = os.environ["MYHELP_PKG_YAML"]
     packages = myhelp.PackageViewer(db_file, yaml_file, reload=True, feedback=True)
     assert len(packages.search("python3")) > 0
+    results = packages.lookup(["python3", "qwertyuiop", "python3"])
+    assert results["python3"] == packages["python3"]
+    assert results["qwertyuiop"] == []
+    assert any(msg.startswith("python3 is a") for msg in packages.search("pyth*3"))
+    assert packages.search("pyth_n3*") == []
     #assert len(packages["python"]) > 0
 
 
+def test_glob_to_sql():
+    assert myhelp.PackageViewer.glob_to_sql("py*3") == "py%3"
+    assert myhelp.PackageViewer.glob_to_sql("a_b%*") == r"a\_b\%%"
+
+
 def test_DeviceViewer():
     devices = myhelp.DeviceViewer()
     assert len(devices.search("*")) > 0
+    assert myhelp.DeviceViewer.instance() is myhelp.DeviceViewer.instance()
+    assert all(len(partition) == 3 for partition in myhelp.DeviceViewer.read_partitions())
+
+
+SAMPLE_BUILTINS = """###type###
+ls is /usr/bin/ls
+###alias###
+alias ll='ls -l'
+###set###
+HOME=/home/user
+my_func ()
+###declare###
+declare -x HOME="/home/user"
+declare -ar BASH_VERSINFO=([0]="5")
+declare -- PS1="$ "
+"""
+
 
+def test_BuiltInViewer():
+    builtins = myhelp.BuiltInViewer(io.StringIO(SAMPLE_BUILTINS))
+    assert builtins["ll"] == ["ll is aliased to 'ls -l'."]
+    assert builtins["ls"] == ["ls is /usr/bin/ls."]
+    assert builtins["my_func"] == ["my_func is a shell function."]
+    assert set(builtins["HOME"]) == {"HOME is a shell variable.",
+                                     "HOME has the attribute(s): export."}
+    assert builtins["BASH_VERSINFO"] == [
+        "BASH_VERSINFO has the attribute(s): indexed array, readonly."]
+    assert builtins["PS1"] == ["PS1 is a shell variable."]
+    assert builtins["splunge"] == []
+    assert len(builtins.search("H*")) == 2
+    assert builtins.search_many(["H*", "l*"]) == {"H*": builtins.search("H*"),
+                                                  "l*": builtins.search("l*")}
 
-#def test_BuiltInViewer():
-#    builtins = myhelp.BuiltInViewer(sys.stdin)
-#    assert len(builtins["HOME"]) > 0
+
+def test_BuiltInViewer_modes():
+    assert myhelp.BuiltInViewer.modes_for(["HOME"]) == {"alias", "declare", "set", "type"}
+    assert myhelp.BuiltInViewer.modes_for(["my.file"]) == {"alias", "declare", "type"}
+    assert myhelp.BuiltInViewer.modes_for(["a b"]) == {"alias", "type"}
+    builtins = myhelp.BuiltInViewer(io.StringIO(SAMPLE_BUILTINS), {"alias", "type"})
+    assert builtins["ll"] == ["ll is aliased to 'ls -l'."]
+    assert builtins["HOME"] == []
 
 
 def test_escape_space():
     assert myhelp.escape_space("this is a test  ") == r"this\ is\ a\ test\ \ "
 
 
+def test_escape_glob():
+    assert myhelp.escape_glob("a b*c") == "'a b'*c"
+    assert myhelp.escape_glob(r"a\*b*") == "'a*b'*''"
+    assert myhelp.split_glob(r"a\*b*c\\d") == ("a*b", "c\\d")
+    assert myhelp.glob_to_regex(r"a\*b*").search("a*bc") is not None
+    assert myhelp.glob_to_regex(r"a\*b*").search("axbc") is None
+    assert myhelp.PackageViewer.glob_to_sql(r"a\*b*") == "a*b%"
+
+
+def test_a_or_an():
+    assert myhelp.a_or_an("ASCII") == "an"
+    assert myhelp.a_or_an("directory") == "a"
+    assert myhelp.a_or_an("empty", lowercase=False) == "An"
+    assert myhelp.a_or_an("Bourne-Again", lowercase=False) == "A"
+
+
 def test_CmdViewer():
     cmd = myhelp.CmdViewer("echo", 'echo "%s"', 0, False, (lambda target, result: [ f"{target}={result}" ]), False)
     assert cmd["TEST"] == ["TEST=TEST"]
+    cmd = myhelp.CmdViewer("echo", ["echo", "%s"], 0, False,
+                           (lambda target, result: [f"{target}={result}"]), False,
+                           applicable=lambda target: target != "SKIP")
+    assert cmd["SKIP"] == []
+    assert cmd.lookup(["TEST", "SKIP"]) == {"TEST": ["TEST=TEST"], "SKIP": []}
 
 
 def test_glob_to_regex():
     regex = myhelp.glob_to_regex("apple*jack")
     assert regex.search("apple    jack") is not None
     assert regex.search("squids") is None
+    assert regex.search("apple jack\n") is None
+    assert myhelp.glob_to_regex("a.b").search("axb") is None
+
+
+def test_glob_to_regex_many():
+    regex = myhelp.glob_to_regex_many(("apple*", "*jack"))
+    assert regex.search("applesauce") is not None
+    assert regex.search("lumberjack") is not None
+    assert regex.search("squids") is None
+    pc = myhelp.PatternCounter(SAMPLE_COUNTER)
+    fmt = lambda count, key: [f"{key}={count}"]
+    assert pc.scan_many(["a*", "*e"], fmt) == {"a*": ["apple=2", "able=1"],
+                                               "*e": ["apple=2", "able=1", "splunge=1"]}
 
 
 def test_init_cmd_viewer():
@@ -112,3 +203,81 @@ def test_init_cmd_viewer():
         bad_result.extend(cmd[bad_file])
     assert good_result != []
     assert bad_result == []
+
+
+def test_EntViewer():
+    users = myhelp.EntViewer("passwd", "user")
+    assert users["root"] == ["There is a user named root."]
+    assert users["0"] == ["There is a user named 0."]
+    assert users["qwertyuiop"] == []
+    services = myhelp.EntViewer("services", "service")
+    assert services.keys("ssh\t\t22/tcp\t\t# SSH Remote Login Protocol\n") == [
+        "ssh", "22", "22/tcp", "ssh/tcp"]
+    assert services.lookup(["qwertyuiop", "root"]) == {"qwertyuiop": [], "root": []}
+    # Threads racing on the first lookup must all see the fully loaded names.
+    users = myhelp.EntViewer("passwd", "user")
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        assert all(msgs == ["There is a user named root."]
+                   for msgs in pool.map(users.__getitem__, ["root"] * 64))
+
+
+def test_FileTypeViewer():
+    my_dir = os.path.dirname(os.path.abspath(__file__))
+    good_file = f"{my_dir}/DUMMY FILE"
+    file_cmd = [cmd for cmd in myhelp.init_cmd_viewers() if cmd.cmd_name == "file"][0]
+    assert file_cmd[my_dir] == [f"{my_dir} is a directory."]
+    assert file_cmd.lookup([my_dir, good_file]) == {my_dir: file_cmd[my_dir],
+                                                    good_file: file_cmd[good_file]}
+    # `file` describes the sticky bit, so sticky directories are passed to it.
+    sticky_dir = tempfile.mkdtemp()
+    try:
+        os.chmod(sticky_dir, 0o1777)
+        assert file_cmd[sticky_dir] != [f"{sticky_dir} is a directory."]
+        assert "sticky" in file_cmd[sticky_dir][0]
+    finally:
+        os.rmdir(sticky_dir)
+
+
+def test_FileSystemViewer():
+    my_dir = os.path.dirname(os.path.abspath(__file__))
+    good_file = f"{my_dir}/DUMMY FILE"
+    viewer = myhelp.FileSystemViewer()
+    assert re.match(r".*/DUMMY FILE is on filesystem .* \(type .*\)\.$", viewer[good_file][0])
+    assert viewer[good_file + "qwertyuiop"] == []
+    assert viewer.search(f"{my_dir}/DUMMY*") == viewer[good_file]
+
+
+def test_CmdViewer_lookup():
+    my_dir = os.path.dirname(os.path.abspath(__file__))
+    good_file = f"{my_dir}/DUMMY FILE"
+    bad_file = good_file + "qwertyuiop"
+    file_cmd = [cmd for cmd in myhelp.init_cmd_viewers() if cmd.cmd_name == "file"][0]
+    results = file_cmd.lookup([good_file, bad_file])
+    assert results[good_file] == file_cmd[good_file]
+    assert results[bad_file] == []
+    which_cmd = [cmd for cmd in myhelp.init_cmd_viewers() if cmd.cmd_name == "which"][0]
+    results = which_cmd.lookup(["sh", "qwertyuiop", "/bin/sh"])
+    assert results["sh"] == which_cmd["sh"]
+    assert results["qwertyuiop"] == []
+    assert results["/bin/sh"] == ["/bin/sh is the command /bin/sh."]
+    passwd_cmd = [cmd for cmd in myhelp.init_cmd_viewers() if cmd.cmd_name == "getent passwd"][0]
+    results = passwd_cmd.lookup(["root", "qwertyuiop", "0"])
+    assert results == {"root": ["There is a user named root."], "qwertyuiop": [],
+                       "0": ["There is a user named 0."]}
+
+
+def test_lookup_all():
+    cmds = [myhelp.CmdViewer("echo", ["echo", "%s"], 0, False,
+                             (lambda target, result: [f"{target}={result}"]), False)]
+    results = myhelp.lookup_all(cmds, ["a", "b c"])
+    assert results == [{"a": ["a=a"], "b c": ["b c=b c"]}]
+    assert myhelp.lookup_all(cmds, []) == [{}]
+
+
+def test_search_all():
+    my_dir = os.path.dirname(os.path.abspath(__file__))
+    cmds = myhelp.init_cmd_viewers()
+    results = myhelp.search_all(cmds, [f"{my_dir}/DUMMY*"])
+    assert len(results) == len([cmd for cmd in cmds if cmd.glob_able])
+    assert any(f"{my_dir}/DUMMY FILE is an ASCII text file." in result[f"{my_dir}/DUMMY*"]
+               for result in results)
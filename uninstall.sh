@@ -142,6 +142,7 @@ if [[ "${force}" = '-f' ]]; then
     fi
 else
     quiet_rm "${MYHELP_CFG_DIR}"/packages.yaml
+    quiet_rm "${MYHELP_CFG_DIR}"/packages.yaml.cache.json
     quiet_rm "${MYHELP_CFG_DIR}"/packages.db
     rmdir --ignore-fail-on-non-empty "${MYHELP_CFG_DIR}"
 fi